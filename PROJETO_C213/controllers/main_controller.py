@@ -1,12 +1,17 @@
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
-from PyQt5.QtCore import QLocale, Qt
+from PyQt5.QtCore import QLocale, QTimer, QThreadPool
 import numpy as np
 import pyqtgraph as pg
 import pyqtgraph.exporters 
+from views.plot_items import remove_plot_item
+from .worker import Worker
 
 # Configura o locale para ponto decimal (necessário para comunicação numérica precisa)
 QLocale.setDefault(QLocale(QLocale.English, QLocale.AnyCountry))
 
+# Antialiasing é o principal custo de desenho do pyqtgraph em curvas longas
+pg.setConfigOptions(antialias=False)
+
 class MainController:
     """
     Controlador da Aplicação (Camada C - Controller).
@@ -19,10 +24,43 @@ class MainController:
         self.model = model  # Acesso aos métodos de cálculo (ID, Sintonia, Simulação)
         self.view = view    # Acesso aos widgets da interface (IHM)
         self.last_plot_data = None 
+        self._workers = set()  # tarefas em andamento no QThreadPool (mantidas vivas até terminarem)
+        self._t_plot = None    # (t do Model, cópia float32 para desenho), refeita só quando t muda
+
+        # Agrupa rajadas de pedidos de recálculo do PID (troca de modo/método, edição do λ)
+        # em uma única execução, 50 ms após o último pedido
+        self._recalc_timer = QTimer()
+        self._recalc_timer.setSingleShot(True)
+        self._recalc_timer.setInterval(50)
+        self._recalc_timer.timeout.connect(self.run_tuning_calculation_action)
         
         # O processo inicia conectando a interface ao backend
         self.connect_signals()
 
+    @staticmethod
+    def _plot_array(a):
+        """
+        Cópia float32 de um sinal só para desenho: metade dos bytes na montagem do QPainterPath.
+        A precisão do gráfico é limitada pelo pixel; os cálculos do Model continuam em float64.
+        """
+        return np.asarray(a, dtype=np.float32)
+
+    def _plot_time(self, t):
+        """Eixo de tempo float32 compartilhado pelas curvas; t só muda a cada arquivo carregado."""
+        if self._t_plot is None or self._t_plot[0] is not t:
+            self._t_plot = (t, self._plot_array(t))
+        return self._t_plot[1]
+
+    def _show_item(self, plot, item, visible=True):
+        """
+        Insere ou retira um item persistente do gráfico sem recriá-lo (a legenda acompanha).
+        Usado para itens com entrada na legenda; marcadores sem legenda apenas alternam setVisible.
+        """
+        if visible and item not in plot.items:
+            plot.addItem(item)
+        elif not visible and item in plot.items:
+            remove_plot_item(plot, item)
+
     def connect_signals(self):
         """Conecta eventos (Sinais) dos widgets aos métodos de processamento (Slots) do Controller."""
         
@@ -48,7 +86,10 @@ class MainController:
         self.view.control_tab.cb_tuning_method.currentTextChanged.connect(self.handle_method_change)
         
         # Conecta a mudança do valor de Lambda (λ) ao recálculo do PID
-        self.view.control_tab.le_lambda.valueChanged.connect(self.run_tuning_calculation_action)
+        # (só no modo Método: no Manual o λ muda com clear_tuning_fields e não deve repreencher Kp/Ti/Td)
+        self.view.control_tab.le_lambda.valueChanged.connect(
+            lambda _: self._recalc_timer.start() if self.view.control_tab.radio_method.isChecked() else None
+        )
         
         # Reseta as métricas ao mudar o SetPoint para forçar uma nova simulação
         self.view.control_tab.le_setpoint.valueChanged.connect(self.view.control_tab.clear_metrics)
@@ -84,15 +125,34 @@ class MainController:
                 QMessageBox.critical(self.view, "Erro de Carregamento", "Falha ao carregar o arquivo .mat ou dados inválidos.")
 
     def run_identification_action(self):
-        """Executa a identificação FOPDT, seleciona o melhor modelo (menor RMSE) e atualiza a IHM."""
+        """Dispara a identificação FOPDT no QThreadPool; o resultado chega em show_identification_results."""
         
         self.view.control_tab.clear_metrics()
-        self.view.control_tab.plot_widget.clear()
+        self.view.control_tab.clear_plot()
         self.view.identification_tab.btn_export_graph.setEnabled(False)
 
+        # Enquanto o Model trabalha fora da IHM, nada mais pode alterá-lo (novo arquivo, simulação)
+        self.view.identification_tab.btn_identify.setEnabled(False)
+        self.view.identification_tab.btn_load.setEnabled(False)
+        self.view.control_tab.setEnabled(False)
+
         # Chama a lógica de cálculo do Modelo
-        results = self.model.run_identification()
-        
+        self.start_worker(
+            Worker(self.model.run_identification),
+            self.show_identification_results,
+            self.identification_failed,
+        )
+
+    def identification_failed(self, msg):
+        """Erro levantado na identificação (vindo do Worker): registra a mensagem e trata como falha."""
+        print(f"Erro na identificação: {msg}")
+        self.show_identification_results(None)
+
+    def show_identification_results(self, results):
+        """Recebe o resultado da identificação (thread da IHM), seleciona o modelo e atualiza a IHM."""
+        self.view.identification_tab.btn_identify.setEnabled(True)
+        self.view.identification_tab.btn_load.setEnabled(True)
+
         if results and np.isfinite(results['k']) and np.isfinite(results['tau']):
             # 1. Exibe os parâmetros FOPDT do modelo escolhido
             self.view.identification_tab.le_k.setText(f"{results['k']:.4f}")
@@ -113,8 +173,13 @@ class MainController:
             self.view.control_tab.setEnabled(True)
             self.view.identification_tab.btn_export_graph.setEnabled(True)
             
-            # Inicializa SetPoint com o valor de regime (y_final)
-            self.view.control_tab.le_setpoint.setValue(self.model.y0 + self.model.den_norm) 
+            # Inicializa SetPoint com o valor de regime (y_final); as métricas já foram limpas acima,
+            # então o valueChanged do SetPoint fica bloqueado durante a atualização programática
+            self.view.control_tab.le_setpoint.blockSignals(True)
+            try:
+                self.view.control_tab.le_setpoint.setValue(self.model.y0 + self.model.den_norm)
+            finally:
+                self.view.control_tab.le_setpoint.blockSignals(False)
             
             # Força o cálculo inicial da sintonia (para exibir os Kp, Ti, Td iniciais)
             self.run_tuning_calculation_action()
@@ -126,16 +191,22 @@ class MainController:
 
     def plot_identification_data(self, t_exp, y_exp, t_model=None, y_model=None, method_id="", clear_model=False):
         """Função genérica de plotagem para a aba de Identificação."""
-        plot = self.view.identification_tab.plot_widget.plotItem
-        
-        plot.clear()
+        tab = self.view.identification_tab
+        plot = tab.plot_widget.plotItem
         
         # Curva Experimental (Dados da Planta)
-        plot.plot(t_exp, y_exp, pen='k', name='Experimental')
+        tab.curve_exp.setData(self._plot_time(t_exp), self._plot_array(y_exp))
+        self._show_item(plot, tab.curve_exp)
         
-        # Curva do Modelo FOPDT
-        if y_model is not None and not np.any(np.isnan(y_model)):
-            plot.plot(t_model, y_model, pen=pg.mkPen('r', width=2), name=f'Modelo FOPDT ({method_id})')
+        # Curva do Modelo FOPDT (oculta quando não há modelo válido)
+        show_model = y_model is not None and not np.any(np.isnan(y_model))
+        if show_model:
+            model_name = f'Modelo FOPDT ({method_id})'
+            tab.curve_model.setData(self._plot_time(t_model), self._plot_array(y_model), name=model_name)
+            label = plot.legend.getLabel(tab.curve_model)
+            if label is not None:
+                label.setText(model_name)
+        self._show_item(plot, tab.curve_model, show_model)
         
         # Atualiza o título do gráfico
         if not clear_model:
@@ -143,8 +214,6 @@ class MainController:
         else:
              plot.setTitle("Curva de Reação - Dados Experimentais")
 
-        plot.addLegend()
-
 
     # -------------------------------------------------------------------------
     # --- Métodos de Sintonia e Simulação (Controle PID) ---
@@ -163,13 +232,16 @@ class MainController:
         self.view.control_tab.btn_clear_manual.setEnabled(is_manual_mode)
 
         self.view.control_tab.clear_metrics()
-        self.view.control_tab.plot_widget.clear()
+        self.view.control_tab.clear_plot()
 
         # Atualiza os campos e recalcula se necessário
         self.handle_method_change(self.view.control_tab.cb_tuning_method.currentText())
         if is_method_mode:
-            self.run_tuning_calculation_action()
+            self._recalc_timer.start()
         else:
+            # Descarta um recálculo ainda pendente (troca de método/λ há < 50 ms), que
+            # sobrescreveria os campos manuais logo após a limpeza
+            self._recalc_timer.stop()
             self.view.control_tab.clear_tuning_fields() # Prepara para a inserção manual
 
 
@@ -185,7 +257,7 @@ class MainController:
         
         # Recalcula o Kp/Ti/Td se o método for alterado no modo automático
         if self.view.control_tab.radio_method.isChecked():
-            self.run_tuning_calculation_action()
+            self._recalc_timer.start()
 
 
     def run_tuning_calculation_action(self):
@@ -196,27 +268,36 @@ class MainController:
         # Chama o Model para obter a sintonia
         Kp, Ti, Td = self.model.calculate_pid_tuning(method, lambda_val)
         
-        # Atualiza os spin boxes com os valores calculados
-        if np.isfinite(Kp):
-            self.view.control_tab.le_kp.setValue(Kp)
-            self.view.control_tab.le_ti.setValue(Ti)
-            self.view.control_tab.le_td.setValue(Td)
-        else:
-            # Em caso de falha no cálculo (ex: Kp = NaN)
-            self.view.control_tab.le_kp.setValue(0.0)
-            self.view.control_tab.le_ti.setValue(0.01)
-            self.view.control_tab.le_td.setValue(0.0)
-            if self.view.control_tab.radio_method.isChecked():
-                QMessageBox.warning(self.view, "Aviso", "Parâmetros FOPDT inválidos. A sintonia automática não pode ser calculada.")
+        # Atualiza os spin boxes com os valores calculados, sem reemitir valueChanged
+        # (a atualização é programática e não deve disparar os slots ligados a esses campos)
+        tab = self.view.control_tab
+        spin_boxes = (tab.le_kp, tab.le_ti, tab.le_td)
+        values = (Kp, Ti, Td) if np.isfinite(Kp) else (0.0, 0.01, 0.0)  # falha no cálculo (ex: Kp = NaN)
+        try:
+            for spin_box, value in zip(spin_boxes, values):
+                spin_box.blockSignals(True)
+                spin_box.setValue(value)
+        finally:
+            for spin_box in spin_boxes:
+                spin_box.blockSignals(False)
+
+        if not np.isfinite(Kp) and self.view.control_tab.radio_method.isChecked():
+            QMessageBox.warning(self.view, "Aviso", "Parâmetros FOPDT inválidos. A sintonia automática não pode ser calculada.")
 
     def run_tuning_simulation_action(self):
         """
         Executa a simulação em malha fechada do sistema e exibe o desempenho do controlador.
         
-        Esta função lê os parâmetros PID da IHM (seja por sintonia automática ou manual),
-        chama o Model para realizar a simulação e atualiza o gráfico com SetPoint e Overhoot.
+        Esta função lê os parâmetros PID da IHM (seja por sintonia automática ou manual)
+        e dispara a simulação do Model no QThreadPool; show_simulation_results atualiza o
+        gráfico com SetPoint e Overhoot quando o resultado chega.
         """
-        
+
+        # Recálculo pendente (ex.: λ recém-alterado): aplica agora para não simular Kp/Ti/Td antigos
+        if self._recalc_timer.isActive():
+            self._recalc_timer.stop()
+            self.run_tuning_calculation_action()
+
         # Lê o SetPoint (valor de referência) da interface
         setpoint = self.view.control_tab.le_setpoint.value()
         
@@ -230,94 +311,47 @@ class MainController:
         Ti = self.view.control_tab.le_ti.value()
         Td = self.view.control_tab.le_td.value()
         
-        # Chama a lógica de simulação do Model
-        t_sim, y_cl, metrics = self.model.simulate_closed_loop(setpoint, Kp, Ti, Td)
+        # Chama a lógica de simulação do Model no QThreadPool. Até o resultado chegar nada pode
+        # alterar o Model (nova simulação, novo arquivo ou identificação), pois a resposta é
+        # escrita no buffer compartilhado do Model e plotada contra a grade t desta simulação
+        self.set_simulation_running(True)
+        self.start_worker(
+            Worker(self.model.simulate_closed_loop, setpoint, Kp, Ti, Td),
+            lambda result: self.show_simulation_results(result, setpoint, Kp, Ti, Td),
+            lambda msg: self.simulation_failed(msg, setpoint, Kp, Ti, Td),
+        )
+
+    def simulation_failed(self, msg, setpoint, Kp, Ti, Td):
+        """Erro levantado na simulação (vindo do Worker): registra a mensagem e trata como falha."""
+        print(f"Erro na simulação: {msg}")
+        self.show_simulation_results((None, None, None), setpoint, Kp, Ti, Td)
+
+    def set_simulation_running(self, running):
+        """Bloqueia (ou libera) as ações que alteram o Model enquanto a simulação roda no pool."""
+        # A aba inteira: modo, método, λ e ganhos também alteram o Model (recálculo da sintonia)
+        self.view.control_tab.setEnabled(not running)
+        self.view.identification_tab.btn_load.setEnabled(not running)
+        self.view.identification_tab.btn_identify.setEnabled(not running)
+
+    def show_simulation_results(self, result, setpoint, Kp, Ti, Td):
+        """Recebe a simulação em malha fechada (thread da IHM) e exibe curva, marcadores e métricas."""
+        t_sim, y_cl, metrics = result
+        self.set_simulation_running(False)
         
         # Limpa os campos de métricas antes de exibir os novos resultados (necessário para resetar '---')
         self.view.control_tab.clear_metrics() 
 
         # Atualiza a interface com os resultados
         if y_cl is not None and not np.any(np.isnan(y_cl)):
-            plot = self.view.control_tab.plot_widget.plotItem
-            plot.clear()
-            
-            # --- 1. PLOTAGEM PRINCIPAL E CONFIGURAÇÃO DA LEGENDA ---
-            
-            # CRIAÇÃO DA LEGENDA NA POSIÇÃO INFERIOR DIREITA
-            plot.addLegend(offset=(-1, -1)) 
-            
-            # Curva de Resposta PID (Linha Principal)
-            plot.plot(self.model.t, y_cl, pen=pg.mkPen('k', width=2), name='Resposta PID')
-            
-            # Linha de SetPoint (Horizontal, cor azul tracejada) - MARCADOR VISUAL
-            setpoint_pen = pg.mkPen('b', width=1, style=Qt.DashLine)
-            setpoint_line = pg.InfiniteLine(pos=setpoint, angle=0, pen=setpoint_pen)
-            plot.addItem(setpoint_line)
-            # Item da Legenda AZUL (SetPoint)
-            plot.plot([], [], pen=setpoint_pen, name='SetPoint (SP)')
-
-            # Linha de Overshoot (Mp) e Marcadores
-            Mp_value = np.max(y_cl)
-            
-            # --- MARCADOR: PICO (Mp) ---
-            if metrics['Mp'] > 0.01:
-                overshoot_pen_style = pg.mkPen('r', width=1, style=Qt.DotLine)
-                overshoot_color = 'r'
-                
-                overshoot_line = pg.InfiniteLine(pos=Mp_value, angle=0, pen=overshoot_pen_style)
-                plot.addItem(overshoot_line)
-                
-                t_peak_idx = np.argmax(y_cl)
-                t_peak = self.model.t[t_peak_idx]
-                
-                # ADIÇÃO DO PONTO (Bolinha) no Pico
-                plot.plot([t_peak], [Mp_value], 
-                    symbol='o',  
-                    symbolSize=8, 
-                    symbolPen=pg.mkPen(overshoot_color, width=2), 
-                    symbolBrush=overshoot_color, 
-                    name=None 
-                )
-
-                # Anotação de texto (Pico/Overshoot)
-                text_mp = pg.TextItem(
-                    html=f'<div style="text-align: center; color: red;">Pico: {Mp_value:.2f}</div>', 
-                    anchor=(0.5, 1.5)
-                )
-                plot.addItem(text_mp)
-                text_mp.setPos(t_peak, Mp_value)
-                
-                # Item da Legenda VERMELHA
-                plot.plot([], [], pen=overshoot_pen_style, name=f'Overshoot (Mp = {metrics["Mp"]:.2f}%)')
-            
-            # --- MARCADOR: TEMPO DE ACOMODAÇÃO (ts) ---
-            if np.isfinite(metrics['ts']):
-                ts_pen_style = pg.mkPen('g', width=1, style=Qt.DotLine)
-                ts_color = 'g'
-                
-                ts_line = pg.InfiniteLine(
-                    pos=metrics['ts'], 
-                    angle=90, # Linha vertical
-                    pen=ts_pen_style
-                )
-                plot.addItem(ts_line)
-                
-                # ADIÇÃO DO PONTO no Tempo de Acomodação
-                plot.plot([metrics['ts']], [setpoint], 
-                    symbol='o', 
-                    symbolSize=8, 
-                    symbolPen=pg.mkPen(ts_color, width=2), 
-                    symbolBrush=ts_color, 
-                    name=None
-                )
-                
-                # Anotação de texto (Tempo de Acomodação)
-                text_ts = pg.TextItem(
-                    html=f'<div style="text-align: center; color: green;">ts: {metrics["ts"]:.2f}s</div>', 
-                    anchor=(0.5, 0)
-                )
-                plot.addItem(text_ts)
-                text_ts.setPos(metrics['ts'], setpoint) 
+            tab = self.view.control_tab
+            plot = tab.plot_widget.plotItem
+
+            # Todas as alterações dos itens viram um único repaint no fim
+            tab.plot_widget.setUpdatesEnabled(False)
+            try:
+                self.update_control_plot(t_sim, setpoint, y_cl, metrics)
+            finally:
+                tab.plot_widget.setUpdatesEnabled(True)
 
             plot.setTitle(f"Resposta PID (Kp={Kp:.3g}, Ti={Ti:.3g}, Td={Td:.3g})")
             
@@ -334,13 +368,78 @@ class MainController:
             # Tratamento de erro para simulações instáveis
             self.view.control_tab.btn_export_graph.setEnabled(False)
             QMessageBox.critical(self.view, "Erro de Simulação", "O controlador é instável ou os parâmetros (Ti, k, tau) são inválidos.")
-    
+
+    def update_control_plot(self, t_sim, setpoint, y_cl, metrics):
+        """Atualiza curva, SetPoint e marcadores de Mp/ts do gráfico de Controle com a nova simulação."""
+        tab = self.view.control_tab
+        plot = tab.plot_widget.plotItem
+
+        # --- 1. PLOTAGEM PRINCIPAL (itens persistentes, só os dados mudam) ---
+        
+        # Curva de Resposta PID (Linha Principal)
+        tab.curve_response.setData(self._plot_time(t_sim), self._plot_array(y_cl))
+        self._show_item(plot, tab.curve_response)
+        
+        # Linha de SetPoint (Horizontal, cor azul tracejada) - MARCADOR VISUAL
+        tab.sp_line.setValue(setpoint)
+        self._show_item(plot, tab.sp_line)
+        # Item da Legenda AZUL (SetPoint)
+        self._show_item(plot, tab.sp_legend)
+
+        # Linha de Overshoot (Mp) e Marcadores
+        Mp_value = np.max(y_cl)
+        
+        # --- MARCADOR: PICO (Mp) ---
+        show_mp = bool(metrics['Mp'] > 0.01)
+        if show_mp:
+            tab.mp_line.setValue(Mp_value)
+            
+            t_peak_idx = np.argmax(y_cl)
+            t_peak = t_sim[t_peak_idx]
+            
+            # Ponto (Bolinha) no Pico
+            tab.mp_marker.setData([t_peak], [Mp_value])
+
+            # Anotação de texto (Pico/Overshoot)
+            tab.mp_text.setHtml(f'<div style="text-align: center; color: red;">Pico: {Mp_value:.2f}</div>')
+            tab.mp_text.setPos(t_peak, Mp_value)
+            
+            # Item da Legenda VERMELHA
+            mp_name = f'Overshoot (Mp = {metrics["Mp"]:.2f}%)'
+            tab.mp_legend.setData([], [], name=mp_name)
+            label = plot.legend.getLabel(tab.mp_legend)
+            if label is not None:
+                label.setText(mp_name)
+        for item in (tab.mp_line, tab.mp_marker, tab.mp_text):
+            self._show_item(plot, item)
+            item.setVisible(show_mp)
+        self._show_item(plot, tab.mp_legend, show_mp)
+        
+        # --- MARCADOR: TEMPO DE ACOMODAÇÃO (ts) ---
+        show_ts = bool(np.isfinite(metrics['ts']))
+        if show_ts:
+            tab.ts_line.setValue(metrics['ts'])
+            
+            # Ponto no Tempo de Acomodação
+            tab.ts_marker.setData([metrics['ts']], [setpoint])
+            
+            # Anotação de texto (Tempo de Acomodação)
+            tab.ts_text.setHtml(f'<div style="text-align: center; color: green;">ts: {metrics["ts"]:.2f}s</div>')
+            tab.ts_text.setPos(metrics['ts'], setpoint) 
+        for item in (tab.ts_line, tab.ts_marker, tab.ts_text):
+            self._show_item(plot, item)
+            item.setVisible(show_ts)
+
     # -------------------------------------------------------------------------
     # --- Ações de Exportação ---
     # -------------------------------------------------------------------------
     
     def export_graph_action(self, plot_widget):
-        """Exporta o gráfico atual (PyQtGraph) para um arquivo de imagem (PNG/JPG)."""
+        """
+        Exporta o gráfico atual (PyQtGraph) para um arquivo de imagem (PNG/JPG).
+        A cena é renderizada na thread da IHM (exigência do Qt); a codificação e a
+        gravação do arquivo, que são a parte lenta, rodam no QThreadPool.
+        """
         # 1. Abrir diálogo de salvamento
         filepath, _ = QFileDialog.getSaveFileName(
             self.view, "Salvar Gráfico", "resposta_pid", "PNG Image (*.png);;JPEG Image (*.jpg)"
@@ -348,9 +447,38 @@ class MainController:
         
         if filepath:
             try:
-                # Usa o submódulo pyqtgraph.exporters para renderizar a imagem
+                # Usa o submódulo pyqtgraph.exporters para renderizar a imagem (QImage em memória)
                 exporter = pg.exporters.ImageExporter(plot_widget.plotItem)
-                exporter.export(filepath)
-                QMessageBox.information(self.view, "Sucesso", f"Gráfico salvo em: {filepath}")
+                image = exporter.export(toBytes=True)
             except Exception as e:
-                QMessageBox.critical(self.view, "Erro de Exportação", f"Falha ao salvar o gráfico: {e}")
\ No newline at end of file
+                QMessageBox.critical(self.view, "Erro de Exportação", f"Falha ao salvar o gráfico: {e}")
+                return
+
+            self.start_worker(
+                Worker(self._save_image, image, filepath),
+                lambda path: QMessageBox.information(self.view, "Sucesso", f"Gráfico salvo em: {path}"),
+                lambda msg: QMessageBox.critical(self.view, "Erro de Exportação", f"Falha ao salvar o gráfico: {msg}"),
+            )
+
+    @staticmethod
+    def _save_image(image, filepath):
+        """Grava o QImage em disco (executado no QThreadPool)."""
+        if not image.save(filepath):
+            raise OSError(f"não foi possível gravar '{filepath}'")
+        return filepath
+
+    # -------------------------------------------------------------------------
+    # --- Execução em segundo plano ---
+    # -------------------------------------------------------------------------
+
+    def start_worker(self, worker, on_finished, on_error):
+        """Conecta os sinais do Worker aos slots informados e o envia ao QThreadPool global."""
+        def _done():
+            self._workers.discard(worker)
+
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(on_error)
+        worker.signals.finished.connect(_done)
+        worker.signals.error.connect(_done)
+        self._workers.add(worker)
+        QThreadPool.globalInstance().start(worker)
@@ -0,0 +1,32 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+class WorkerSignals(QObject):
+    """
+    Sinais de um Worker (QRunnable não herda de QObject e não pode declarar sinais).
+    Emitidos da thread do pool e entregues na thread da IHM (conexão enfileirada).
+    """
+    finished = pyqtSignal(object)  # valor retornado pela função
+    error = pyqtSignal(str)        # mensagem da exceção levantada
+
+
+class Worker(QRunnable):
+    """
+    Tarefa genérica para o QThreadPool: executa fn(*args) fora da thread da IHM
+    e devolve o resultado (ou o erro) pelos sinais em self.signals.
+    """
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn, self.args = fn, args
+        self.signals = WorkerSignals()
+        # O Controller guarda a referência até o fim; evita que o pool destrua o objeto
+        # antes de os sinais enfileirados serem entregues
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
@@ -1,6 +1,198 @@
+from functools import lru_cache
+
 import numpy as np
 import scipy.io as sio
-from control import tf, feedback, step_response, pade
+from scipy import signal
+from scipy.linalg import expm
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba é opcional: sem ele os kernels abaixo rodam como Python puro
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    prange = range
+
+# fastmath sem 'nnan'/'ninf': os kernels testam NaN explicitamente (x != x) e precisam desse comportamento
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# Condicionamento máximo dos autovetores da malha fechada para a resposta modal (grade não uniforme)
+_MODAL_COND_MAX = 1e8
+
+
+# -----------------------------------------------------------------------------
+# Padé (malha fechada)
+# -----------------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def _pade_coeffs(theta, order):
+    """
+    Coeficientes (num, den) do Padé de ordem 'order' para e^{-theta s}.
+    Ordem 1 em forma fechada: (2 - theta*s)/(2 + theta*s); demais ordens pela
+    recorrência de Golub & Van Loan (a mesma de control.pade), normalizada por den[0].
+    Memorizado por (theta, order); os arrays devolvidos são somente leitura.
+    """
+    if theta == 0:
+        return _readonly(np.array([1.0]), np.array([1.0]))
+    if order == 1:
+        return _readonly(np.array([-theta, 2.0]) / theta, np.array([theta, 2.0]) / theta)
+
+    num = np.zeros(order + 1); num[-1] = 1.0
+    den = np.zeros(order + 1); den[-1] = 1.0
+    cn = cd = 1.0
+    for j in range(1, order + 1):
+        cn *= -theta * (order - j + 1) / (2 * order - j + 1) / j
+        cd *= theta * (order - j + 1) / (2 * order - j + 1) / j
+        num[order - j] = cn
+        den[order - j] = cd
+    return _readonly(num / den[0], den / den[0])
+
+
+def _readonly(*arrays):
+    """Marca os arrays como somente leitura (resultados compartilhados pelo cache)."""
+    for a in arrays:
+        a.setflags(write=False)
+    return arrays
+
+
+# -----------------------------------------------------------------------------
+# Kernels numéricos (compilados com Numba quando disponível)
+# -----------------------------------------------------------------------------
+# Todos com nogil=True: liberam o GIL, e a IHM segue respondendo enquanto o Worker do QThreadPool calcula
+@njit(cache=True, nogil=True, fastmath=_FASTMATH)
+def _metrics_kernel(t, y, y_final):
+    """
+    Calcula (tr, ts, Mp, ess) em uma varredura direta + uma reversa.
+    Mesma semântica de calculate_metrics: 10–90%, faixa de ±2% e Mp sobre y_final.
+    """
+    n = y.shape[0]
+    thr10, thr90 = 0.1 * y_final, 0.9 * y_final
+    t10, t90 = np.nan, np.nan
+    y_max, has_nan = -np.inf, False
+
+    # Varredura direta: primeiros cruzamentos de 10%/90% e pico
+    for i in range(n):
+        yi = y[i]
+        if yi != yi:
+            has_nan = True
+            continue
+        if yi > y_max:
+            y_max = yi
+        if t10 != t10 and yi >= thr10:
+            t10 = t[i]
+        if t90 != t90 and yi >= thr90:
+            t90 = t[i]
+    tr = t90 - t10
+
+    # np.max propaga NaN e (NaN > y_final) é falso → Mp = 0
+    Mp = 0.0
+    if not has_nan and y_final != 0 and y_max > y_final:
+        Mp = (y_max - y_final) / y_final * 100.0
+
+    # Varredura reversa: última amostra fora da faixa de ±2%
+    band = 0.02 * abs(y_final)
+    last_out = -1
+    for i in range(n - 1, -1, -1):
+        if abs(y[i] - y_final) > band:
+            last_out = i
+            break
+    if last_out < 0:
+        ts = t[0]
+    elif last_out + 1 < n:
+        ts = t[last_out + 1]
+    else:
+        ts = t[n - 1]
+
+    ess = abs(y_final - y[n - 1])
+    return tr, ts, Mp, ess
+
+
+@njit(cache=True, nogil=True, fastmath=_FASTMATH)
+def _step_levels(a, step_idx, w_pre, w_post):
+    """
+    Níveis (medianas) de 'a' numa única chamada: antes do degrau, logo após o degrau e no fim do registro.
+    Janelas: [step_idx - w_pre, step_idx), [step_idx + 1, step_idx + 1 + w_post) e as últimas w_post amostras.
+    """
+    n = a.shape[0]
+    pre = a[max(0, step_idx - w_pre):step_idx] if step_idx > 0 else a[:w_pre]
+    post = a[step_idx + 1:min(n, step_idx + 1 + w_post)] if step_idx + 1 < n else a[-w_post:]
+    return np.median(pre), np.median(post), np.median(a[-w_post:])
+
+
+@njit(cache=True, nogil=True, fastmath=_FASTMATH, parallel=True)
+def _fopdt_batch_kernel(t, taus, thetas, y0, dy, y_true, out, rmses):
+    """
+    Resposta analítica ao degrau de M candidatos FOPDT em paralelo, um por thread:
+    y(t) = y0 + dy*(1 - e^{-(t - theta)/tau}) para t >= theta (medido a partir de t[0]) e y0 antes.
+    O RMSE contra y_true é acumulado na própria varredura (rmses[m]); a saída só é gravada em
+    out[m] se out tiver M linhas, com out de 0 linhas nada é materializado.
+    """
+    M = taus.shape[0]
+    N = y_true.shape[0]
+    store = out.shape[0] == M
+    for m in prange(M):
+        tau, theta = taus[m], thetas[m]
+        sse = 0.0
+        for i in range(N):
+            s = t[i] - t[0] - theta
+            y_hat = y0 + dy * (1.0 - np.exp(-s / tau)) if s >= 0.0 else y0
+            if store:
+                out[m, i] = y_hat
+            e = y_true[i] - y_hat
+            sse += e * e
+        rmses[m] = np.sqrt(sse / N) if sse == sse else np.inf
+
+
+@njit(cache=True, nogil=True, fastmath=_FASTMATH)
+def _dstep_kernel(Phis, Gammas, idx, Cd, Dd, out):
+    """
+    Resposta ao degrau unitário, a partir do repouso, discretizada por ZOH intervalo a intervalo:
+    y[i] = Cd x[i] + Dd;  x[i+1] = Phis[j] x[i] + Gammas[j], com j = idx[i] o passo t[i+1] - t[i].
+    Grade uniforme → um único (Phi, Gamma). Grava direto em out.
+    """
+    n = Gammas.shape[1]
+    N = out.shape[0]
+    x = np.zeros(n)
+    x_next = np.empty(n)
+    for i in range(N):
+        acc = Dd
+        for r in range(n):
+            acc += Cd[r] * x[r]
+        out[i] = acc
+        if i + 1 == N:
+            break
+
+        j = idx[i]
+        for r in range(n):
+            acc = Gammas[j, r]
+            for c in range(n):
+                acc += Phis[j, r, c] * x[c]
+            x_next[r] = acc
+        for r in range(n):
+            x[r] = x_next[r]
+
+
+@njit(cache=True, nogil=True, fastmath=_FASTMATH)
+def _modal_step_kernel(t, lams, gains, Dd, out):
+    """
+    Resposta ao degrau unitário, a partir do repouso, avaliada em cada instante pela forma modal:
+    y(t) = Dd + Re sum_j gains[j] * (e^{lams[j] s} - 1)/lams[j],  s = t - t[0],
+    com gains = (C V) * (V^-1 B) da decomposição A = V diag(lams) V^-1. Exata em qualquer grade, O(N n).
+    """
+    t0 = t[0]
+    for i in range(out.shape[0]):
+        s = t[i] - t0
+        acc = Dd
+        for j in range(lams.shape[0]):
+            z = lams[j] * s
+            if abs(z) < 1e-5:
+                phi = s * (1.0 + z * (0.5 + z / 6.0))   # série de (e^z - 1)/lams[j] perto de z = 0
+            else:
+                phi = (np.exp(z) - 1.0) / lams[j]
+            acc += (gains[j] * phi).real
+        out[i] = acc
+
 
 class PIDModel:
     """
@@ -19,9 +211,17 @@ class PIDModel:
         self.y0, self.du = np.nan, np.nan      # nível inicial e degrau da entrada
         self.den_norm = np.nan                 # dy = y1 - y0
         self.method_id = "N/A"
+        self._y_cl_buf = None                  # saída da malha fechada, reaproveitada entre simulações
+        self._uniform_grid = True              # grade de tempo com passo constante
+        self._dt_uniq, self._dt_idx = None, None  # passos distintos da grade e o índice de cada intervalo
+        self._plant_key, self._plant_ss = None, None  # realização (A, B, C) da planta em malha fechada
+        self._y_norm_cummax = None             # máximo acumulado de (y - y0)/dy, monótono
+        self._data_version = 0                 # incrementado a cada load_data (invalida os caches)
+        self._id_cache = None                  # (versão dos dados, resultado da última identificação)
 
         # Ordem do Padé (identificação/aberta e fechada)
-        self.pade_order_id = pade_id           # identificação/malha aberta (10)
+        # (a identificação usa o atraso exato; pade_id fica só por compatibilidade da assinatura)
+        self.pade_order_id = pade_id
         self.pade_order_cl = pade_cl           # malha fechada (1)
 
         # Últimos parâmetros PID
@@ -30,52 +230,115 @@ class PIDModel:
         # Constantes ITAE
         self.ITAE_CONST = [0.965, -0.85, 0.796, -0.147, 0.308, 0.929]
 
+        # Tabela de despacho das regras de sintonia (nomes iguais aos da IHM)
+        self._tuning_rules = {
+            "Ziegler-Nichols MA": self._tune_zn_open,
+            "IMC": self._tune_imc,
+            "CHR sem Sobressinal": self._tune_chr_no_overshoot,
+            "CHR com Sobressinal": self._tune_chr_overshoot,
+            "ITAE": self._tune_itae,
+            "Cohen e Coon": self._tune_cohen_coon,
+        }
+
+        # Compila os kernels Numba agora, fora do caminho interativo da IHM
+        self._warmup_kernels()
+
+    def _warmup_kernels(self):
+        """
+        Chama cada kernel com dados mínimos para disparar a compilação JIT já na criação do modelo.
+        Com cache=True o código compilado fica em __pycache__ e as próximas execuções só o carregam.
+        """
+        t_dummy = np.linspace(0.0, 1.0, 16)
+        _metrics_kernel(t_dummy, t_dummy, 1.0)
+        _step_levels(t_dummy, 8, 4, 4)
+        _fopdt_batch_kernel(t_dummy, np.ones(1), np.zeros(1), 0.0, 1.0,
+                            t_dummy, np.empty((1, 16)), np.empty(1))
+        _dstep_kernel(np.eye(2)[None], np.ones((1, 2)), np.zeros(15, dtype=np.intp),
+                      np.ones(2), 0.0, np.empty(16))
+        _modal_step_kernel(t_dummy, -np.ones(2, dtype=np.complex128), np.ones(2, dtype=np.complex128),
+                           0.0, np.empty(16))
+
     # -------------------------------------------------------------------------
     # Utilidades
     # -------------------------------------------------------------------------
     def _time_at_norm(self, percent: float):
-        """Retorna o tempo em que (y - y0)/(y1 - y0) atinge 'percent'."""
-        if self.t is None or not np.isfinite(self.den_norm) or abs(self.den_norm) < 1e-9:
+        """
+        Retorna o tempo em que (y - y0)/(y1 - y0) atinge 'percent'.
+        O primeiro cruzamento de y_norm é o do seu máximo acumulado, que é monótono → busca binária.
+        """
+        if self.t is None or self._y_norm_cummax is None:
             return np.nan
-        y_norm = (self.y - self.y0) / self.den_norm
-        idx = np.where(y_norm >= percent)[0]
-        return self.t[idx[0]] if len(idx) else np.nan
+        i = int(np.searchsorted(self._y_norm_cummax, percent))
+        return self.t[i] if i < len(self.t) else np.nan
 
-    def _simulate_fopdt(self, k, tau, theta, t_data, y0):
+    def _simulate_fopdt_batch(self, k, taus, thetas, t_data, y0, y_true, out=None):
         """
-        Simula Gp(s) = (k/(tau*s+1))*e^{-theta s} para passo unitário.
-        Retorna saída ABSOLUTA com DC correto: y0 + dy*(y_step/k).
+        Resposta de Gp(s) = (k/(tau*s+1))*e^{-theta s} ao degrau para vários (tau, theta) de uma vez,
+        pela forma fechada (atraso exato, sem Padé nem integração).
+        Retorna (out, rmses): rmses[m] é o RMSE do candidato m contra y_true; se 'out' (M, N) for
+        informado, recebe as saídas ABSOLUTAS com DC correto y0 + dy*(y_step/k).
+        Sem 'out' apenas pontua os candidatos (out = None), sem materializar as curvas.
         """
-        if not (np.isfinite(k) and np.isfinite(tau) and np.isfinite(theta)) or tau <= 0 or theta < 0:
-            return np.full_like(t_data, np.nan, dtype=float)
+        M, N = len(taus), len(t_data)
+        y_hats = np.empty((0, N)) if out is None else out
+        y_hats.fill(np.nan)
+        rmses = np.full(M, np.inf)
 
-        G = tf([k], [tau, 1])
-        nd, dd = pade(theta, self.pade_order_id)            # Padé da IDENTIFICAÇÃO (10)
-        Gp = G * tf(nd, dd)
-
-        _, y_step = step_response(Gp, T=t_data)             # passo unitário → final = k
-        if abs(k) < 1e-12 or not np.isfinite(self.den_norm):
-            return np.full_like(t_data, np.nan, dtype=float)
+        if abs(k) < 1e-12 or not np.isfinite(self.den_norm) or N < 1:
+            return out, rmses
 
         # Força platô igual ao experimental: y0 + dy
-        return y0 + (self.den_norm) * (y_step / k)
-
-    def _rmse(self, y_true, y_hat):
-        if y_hat is None or np.isnan(y_hat).any() or len(y_true) != len(y_hat):
-            return np.inf
-        e = y_true - y_hat
-        return np.sqrt(np.mean(e**2))
-
-    def _get_pid_tf(self):
-        """PID paralelo: (Kp*Td*s^2 + Kp*s + Kp/Ti) / s"""
-        Kp, Ti, Td = self.Kp, self.Ti, self.Td
+        _fopdt_batch_kernel(np.asarray(t_data, dtype=np.float64), np.asarray(taus, dtype=np.float64),
+                            np.asarray(thetas, dtype=np.float64), float(y0), self.den_norm,
+                            np.asarray(y_true, dtype=np.float64), y_hats, rmses)
+        return out, rmses
+
+    def _fopdt_curve(self, tau, theta):
+        """Curva do modelo FOPDT (tau, theta) sobre self.t, com o mesmo DC dos dados."""
+        out = np.empty((1, len(self.t)))
+        self._simulate_fopdt_batch(self.k, [tau], [theta], self.t, self.y0, self.y, out=out)
+        return out[0]
+
+    def _get_plant_ss(self):
+        """
+        Realização (A, B, C) de Gp(s) = k/(tau*s+1) * Padé(theta, pade_order_cl), estritamente
+        própria (D = 0). Montada uma vez por identificação e reaproveitada enquanto (k, tau, theta)
+        e a ordem do Padé não mudarem.
+        """
+        key = (self.k, self.tau, self.theta, self.pade_order_cl)
+        if key != self._plant_key:
+            nd, dd = _pade_coeffs(float(self.theta), int(self.pade_order_cl))
+            A, B, C, _ = signal.tf2ss(np.polymul([self.k], nd), np.polymul([self.tau, 1.0], dd))
+            self._plant_key, self._plant_ss = key, (A, B, C)
+        return self._plant_ss
+
+    def _closed_loop_ss(self, Kp, Ti, Td):
+        """
+        T(s) = L/(1+L) em espaço de estados, com L = Gc*Gp e PID paralelo Kp*(1 + 1/(Ti*s) + Td*s).
+        L é a planta aumentada de um integrador da saída w = Cx:
+            A_L = [[A, 0], [C, 0]],  B_L = [B; 0],
+            C_L = [Kp*C + Kp*Td*C*A, Kp/Ti],  D_L = Kp*Td*C*B   (derivada de w = CAx + CBe)
+        e a realimentação unitária e = r - y fecha a malha dividindo por (1 + D_L).
+        Retorna None para PID nulo/inválido (saída identicamente zero).
+        """
         if (not np.isfinite(Kp)) or (not np.isfinite(Ti)) or (not np.isfinite(Td)):
-            return tf([0], [1])
+            return None
         if Ti <= 0 or (Kp == 0.0 and Ti == 0.0 and Td == 0.0):
-            return tf([0], [1])
-        num = [Kp * Td, Kp, Kp / Ti]
-        den = [1, 0]
-        return tf(num, den)
+            return None
+
+        A, B, C = self._get_plant_ss()
+        n = A.shape[0]
+        A_L = np.zeros((n + 1, n + 1))
+        A_L[:n, :n], A_L[n, :n] = A, C[0]
+        B_L = np.zeros((n + 1, 1)); B_L[:n] = B
+        C_L = np.empty((1, n + 1))
+        C_L[0, :n] = Kp * C[0] + Kp * Td * (C @ A)[0]
+        C_L[0, n] = Kp / Ti
+        D_L = Kp * Td * (C @ B)[0, 0]
+
+        g = 1.0 + D_L
+        A_cl = A_L - (B_L @ C_L) / g
+        return A_cl, B_L / g, C_L / g, np.array([[D_L / g]])
 
     # -------------------------------------------------------------------------
     # Carregamento e Identificação
@@ -87,26 +350,38 @@ class PIDModel:
         Retorna True se k válido; False caso contrário.
         """
         def _as_1d(a):
-            a = np.asarray(a)
-            a = np.ravel(a)  # 1D
-            return a.astype(float)
+            # float64 sem cópia quando já for; reshape devolve view se o array for contíguo em C
+            # (caso dos vetores (1, N)/(N, 1) do .mat) e só copia quando não há como evitar
+            return np.asarray(a, dtype=float).reshape(-1)
 
-        def _find_first_key(dct, aliases):
-            for k in dct.keys():
+        def _find_first_key(names, aliases):
+            for k in names:
                 lk = k.lower()
                 for a in aliases:
                     if lk == a or lk.endswith(a):  # aceita 'dados/tiempo' etc.
                         return k
             return None
 
+        def _locate_keys(names):
+            return (_find_first_key(names, ["tiempo", "tempo", "time", "t"]),
+                    _find_first_key(names, ["entrada", "input", "u"]),
+                    _find_first_key(names, ["salida", "output", "y"]))
+
+        self._data_version += 1
+        self._y_norm_cummax = None
+
+        # Só os nomes primeiro (whosmat não lê os dados); depois carrega apenas as 3 variáveis
         try:
-            data = sio.loadmat(filepath)
+            keys = _locate_keys([name for name, _, _ in sio.whosmat(filepath)])
+            wanted = [k for k in keys if k is not None]
+            data = sio.loadmat(filepath, variable_names=wanted, squeeze_me=True) if wanted else {}
         except NotImplementedError:
             # v7.3 (HDF5)
             try:
                 import h5py
                 with h5py.File(filepath, "r") as f:
-                    data = {k: f[k][()] for k in f.keys()}
+                    keys = _locate_keys(list(f.keys()))
+                    data = {k: f[k][()] for k in keys if k is not None}
             except Exception as e:
                 print(f"Erro ao ler .mat (v7.3?): {e}")
                 self.t = self.u = self.y = None
@@ -118,11 +393,7 @@ class PIDModel:
             self.k = self.tau = self.theta = np.nan
             return False
 
-        # Localiza chaves
-        t_key = _find_first_key(data, ["tiempo", "tempo", "time", "t"])
-        u_key = _find_first_key(data, ["entrada", "input", "u"])
-        y_key = _find_first_key(data, ["salida", "output", "y"])
-
+        t_key, u_key, y_key = keys
         if t_key is None or u_key is None or y_key is None:
             print(f"Chaves não encontradas. Achei: t={t_key}, u={u_key}, y={y_key}.")
             self.t = self.u = self.y = None
@@ -137,20 +408,26 @@ class PIDModel:
         n = min(len(t), len(u), len(y))
         t, u, y = t[:n], u[:n], y[:n]
 
+        # Limpeza acumulada num vetor de índices e aplicada uma única vez no fim
+        # (idx = None enquanto nada precisar ser removido/reordenado)
         mask = np.isfinite(t) & np.isfinite(u) & np.isfinite(y)
-        t, u, y = t[mask], u[mask], y[mask]
+        idx = None if mask.all() else np.flatnonzero(mask)
+        t_sel = t if idx is None else t[idx]
 
-        if len(t) < 3:
+        if len(t_sel) < 3:
             print("Dados insuficientes após limpeza.")
             self.t = self.u = self.y = None
             self.k = self.tau = self.theta = np.nan
             return False
 
-        # Tempo crescente e sem duplicados
-        sort_idx = np.argsort(t)
-        t, u, y = t[sort_idx], u[sort_idx], y[sort_idx]
-        uniq_mask = np.concatenate(([True], np.diff(t) > 0))
-        t, u, y = t[uniq_mask], u[uniq_mask], y[uniq_mask]
+        # Tempo crescente e sem duplicados (ordena só se o registro não vier estritamente crescente)
+        if not (np.diff(t_sel) > 0).all():
+            order = np.argsort(t_sel)
+            order = order[np.r_[True, np.diff(t_sel[order]) > 0]]
+            idx = order if idx is None else idx[order]
+
+        if idx is not None:
+            t, u, y = t[idx], u[idx], y[idx]
 
         # Degrau em u: maior |Δu|
         du_vec = np.diff(u)
@@ -163,22 +440,19 @@ class PIDModel:
         step_idx = int(np.argmax(np.abs(du_vec)))
         w_pre, w_post = 25, 25
 
-        u0 = float(np.median(u[max(0, step_idx - w_pre): step_idx])) if step_idx > 0 else float(np.median(u[:w_pre]))
-        u1 = float(np.median(u[step_idx + 1: min(len(u), step_idx + 1 + w_post)])) if step_idx + 1 < len(u) else float(np.median(u[-w_post:]))
+        u0, u1, _ = _step_levels(u, step_idx, w_pre, w_post)
+        y0, _, y1 = _step_levels(y, step_idx, w_pre, w_post)
+        self.y0 = float(y0)
 
-        self.y0 = float(np.median(y[max(0, step_idx - w_pre): step_idx])) if step_idx > 0 else float(np.median(y[:w_pre]))
-        y1      = float(np.median(y[-w_post:]))
-
-        self.du       = u1 - u0
-        self.den_norm = y1 - self.y0  # dy
+        self.du       = float(u1 - u0)
+        self.den_norm = float(y1) - self.y0  # dy
 
         # Janela maior se du pequeno
         eps = 1e-6
         if abs(self.du) < eps:
             w_pre2, w_post2 = 50, 50
-            u0b = float(np.median(u[max(0, step_idx - w_pre2): step_idx])) if step_idx > 0 else u0
-            u1b = float(np.median(u[step_idx + 1: min(len(u), step_idx + 1 + w_post2)])) if step_idx + 1 < len(u) else u1
-            self.du = u1b - u0b
+            u0b, u1b, _ = _step_levels(u, step_idx, w_pre2, w_post2)
+            self.du = (u1b if step_idx + 1 < len(u) else u1) - (u0b if step_idx > 0 else u0)
 
         if abs(self.du) < eps or abs(self.den_norm) < eps:
             print(f"Degrau inválido: du={self.du:.3e}, dy={self.den_norm:.3e}.")
@@ -187,6 +461,20 @@ class PIDModel:
             return False
 
         self.t, self.u, self.y = t, u, y
+        # y normalizado calculado uma única vez, num só array (subtração, divisão e máximo in-place)
+        y_norm = np.subtract(y, self.y0)
+        y_norm /= self.den_norm
+        self._y_norm_cummax = np.maximum.accumulate(y_norm, out=y_norm)
+        self._y_cl_buf = np.empty_like(self.t, dtype=np.float64)
+
+        # Passos da grade para a discretização da malha fechada: grade uniforme → um único passo;
+        # senão a malha fechada usa a forma modal e os passos distintos só são levantados se preciso
+        dt = np.diff(t)
+        self._uniform_grid = bool(np.allclose(dt, dt[0]))
+        if self._uniform_grid:
+            self._dt_uniq, self._dt_idx = dt[:1].copy(), np.zeros(len(dt), dtype=np.intp)
+        else:
+            self._dt_uniq, self._dt_idx = None, None
         self.k = self.den_norm / self.du
         return np.isfinite(self.k)
 
@@ -198,6 +486,12 @@ class PIDModel:
         if self.t is None or not np.isfinite(self.k):
             return None
 
+        # Mesmos dados da última identificação: reaproveita o resultado (inclui a curva do modelo)
+        if self._id_cache is not None and self._id_cache[0] == self._data_version:
+            result = self._id_cache[1]
+            self.tau, self.theta, self.method_id = result['tau'], result['theta'], result['method_id']
+            return result
+
         # Smith (28.3% e 63.2%)
         t1s, t2s = self._time_at_norm(0.283), self._time_at_norm(0.632)
         if np.isfinite(t1s) and np.isfinite(t2s) and t2s > t1s:
@@ -206,9 +500,6 @@ class PIDModel:
         else:
             tau_smith, theta_smith = np.nan, np.nan
 
-        y_hat_smith = self._simulate_fopdt(self.k, tau_smith, theta_smith, self.t, self.y0)
-        rmse_smith  = self._rmse(self.y, y_hat_smith)
-
         # Sundaresan & Krishnaswamy (35.3% e 85.3%)
         t1u, t2u = self._time_at_norm(0.353), self._time_at_norm(0.853)
         if np.isfinite(t1u) and np.isfinite(t2u) and t2u > t1u:
@@ -217,32 +508,30 @@ class PIDModel:
         else:
             tau_sun, theta_sun = np.nan, np.nan
 
-        y_hat_sun = self._simulate_fopdt(self.k, tau_sun, theta_sun, self.t, self.y0)
-        rmse_sun  = self._rmse(self.y, y_hat_sun)
-
-        candidates = []
-        for name, tau_c, th_c, yhat_c, rmse_c in [
-            ("Smith", tau_smith, theta_smith, y_hat_smith, rmse_smith),
-            ("Sundaresan", tau_sun, theta_sun, y_hat_sun, rmse_sun),
-        ]:
-            if np.isfinite(tau_c) and tau_c > 0 and np.isfinite(th_c) and th_c >= 0:
-                candidates.append((rmse_c, name, tau_c, th_c, yhat_c))
+        candidates = [
+            (name, tau_c, th_c)
+            for name, tau_c, th_c in [("Smith", tau_smith, theta_smith), ("Sundaresan", tau_sun, theta_sun)]
+            if np.isfinite(tau_c) and tau_c > 0 and np.isfinite(th_c) and th_c >= 0
+        ]
 
         # Fallback sem atraso (theta=0) com tau por 10–90%
         if not candidates:
             t10, t90 = self._time_at_norm(0.10), self._time_at_norm(0.90)
             if np.isfinite(t10) and np.isfinite(t90) and t90 > t10:
-                tau0, theta0 = (t90 - t10) / 2.2, 0.0
-                yhat0 = self._simulate_fopdt(self.k, tau0, theta0, self.t, self.y0)
-                rmse0 = self._rmse(self.y, yhat0)
-                candidates.append((rmse0, "SemAtraso(backup)", tau0, theta0, yhat0))
+                candidates.append(("SemAtraso(backup)", (t90 - t10) / 2.2, 0.0))
             else:
                 return None
 
-        rmse, name, tau, theta, y_model_final = min(candidates, key=lambda x: x[0])
+        # Todos os candidatos pontuados numa única chamada; só o vencedor tem a curva gerada
+        names, taus, thetas = zip(*candidates)
+        _, rmses = self._simulate_fopdt_batch(self.k, taus, thetas, self.t, self.y0, self.y)
+        best = int(np.argmin(rmses))
+        rmse, name, tau, theta = rmses[best], names[best], taus[best], thetas[best]
+        y_model_final = self._fopdt_curve(tau, theta)
         self.tau, self.theta, self.method_id = tau, theta, name
+        self._get_plant_ss()                                # planta da malha fechada já fica pronta
 
-        return {
+        result = {
             'k': self.k,
             'tau': self.tau,
             'theta': self.theta,
@@ -252,58 +541,100 @@ class PIDModel:
             't_exp': self.t,
             'y_model': y_model_final
         }
+        self._id_cache = (self._data_version, result)
+        return result
 
     # -------------------------------------------------------------------------
     # Sintonias
     # -------------------------------------------------------------------------
     def calculate_pid_tuning(self, method, lambda_val=None):
-        """Calcula Kp, Ti, Td conforme o método informado."""
+        """Calcula Kp, Ti, Td conforme o método informado (despacho pela tabela _tuning_rules)."""
         if not (np.isfinite(self.k) and self.tau > 0 and self.theta >= 0 and self.k != 0):
             self.Kp, self.Ti, self.Td = 0.0, 0.0, 0.0
             return 0.0, 0.0, 0.0
 
-        k, tau, theta = self.k, self.tau, self.theta
-        Kp, Ti, Td = np.nan, np.nan, np.nan
+        rule = self._tuning_rules.get(method)
+        Kp, Ti, Td = rule(self.k, self.tau, self.theta, lambda_val) if rule else (np.nan, np.nan, np.nan)
 
-        if method == "Ziegler-Nichols MA":
-            Kp = (1.2 * tau) / (k * theta); Ti = 2 * theta; Td = theta / 2
-
-        elif method == "IMC":
-            lam = lambda_val if (lambda_val is not None and lambda_val > 0) else 1.0
-            Kp = (2 * tau + theta) / (k * (2 * lam + theta))
-            Ti = tau + theta / 2
-            Td = (tau * theta) / (2 * tau + theta)
+        self.Kp, self.Ti, self.Td = Kp, Ti, Td
+        return Kp, Ti, Td
 
-        elif method == "CHR sem Sobressinal":
-            Kp = (0.6 * tau) / (k * theta); Ti = tau; Td = theta / 2
+    # Regras de sintonia: (k, tau, theta, lambda) → (Kp, Ti, Td)
+    @staticmethod
+    def _tune_zn_open(k, tau, theta, lambda_val):
+        return (1.2 * tau) / (k * theta), 2 * theta, theta / 2
+
+    @staticmethod
+    def _tune_imc(k, tau, theta, lambda_val):
+        lam = lambda_val if (lambda_val is not None and lambda_val > 0) else 1.0
+        Kp = (2 * tau + theta) / (k * (2 * lam + theta))
+        Ti = tau + theta / 2
+        Td = (tau * theta) / (2 * tau + theta)
+        return Kp, Ti, Td
 
-        elif method == "CHR com Sobressinal":
-            Kp = (0.95 * tau) / (k * theta); Ti = 1.357 * tau; Td = 0.473 * theta
+    @staticmethod
+    def _tune_chr_no_overshoot(k, tau, theta, lambda_val):
+        return (0.6 * tau) / (k * theta), tau, theta / 2
 
-        elif method == "ITAE":
-            A, B, C, D, E, F = self.ITAE_CONST
-            r = theta / tau
-            Kp = (A / k) * (r)**B
-            Ti = tau * (C + D * r)
-            Td = tau * E * (r)**F
+    @staticmethod
+    def _tune_chr_overshoot(k, tau, theta, lambda_val):
+        return (0.95 * tau) / (k * theta), 1.357 * tau, 0.473 * theta
 
-        elif method == "Cohen e Coon":
-            r = theta / tau
-            Kp = (1 / k) * (16 * tau + 3 * theta) / (12 * theta)
-            Ti = theta * (32 + 6 * r) / (13 + 8 * r)
-            Td = 4 * theta / (11 + 2 * r)
+    def _tune_itae(self, k, tau, theta, lambda_val):
+        A, B, C, D, E, F = self.ITAE_CONST
+        r = theta / tau
+        Kp = (A / k) * (r)**B
+        Ti = tau * (C + D * r)
+        Td = tau * E * (r)**F
+        return Kp, Ti, Td
 
-        self.Kp, self.Ti, self.Td = Kp, Ti, Td
+    @staticmethod
+    def _tune_cohen_coon(k, tau, theta, lambda_val):
+        r = theta / tau
+        Kp = (1 / k) * (16 * tau + 3 * theta) / (12 * theta)
+        Ti = theta * (32 + 6 * r) / (13 + 8 * r)
+        Td = 4 * theta / (11 + 2 * r)
         return Kp, Ti, Td
 
     # -------------------------------------------------------------------------
     # Simulações (Controle PID - CHR/ITAE em Δy com SP absoluto convertido)
     # -------------------------------------------------------------------------
-    def simulate_closed_loop(self, setpoint=1.0, k_p=None, t_i=None, t_d=None):
+    def _modal_step_response(self, ss_cl, t_sim, out):
+        """
+        Degrau unitário da malha fechada pela decomposição A = V diag(lams) V^-1, avaliado direto
+        em cada instante: custo O(N n) em qualquer grade, sem um expm por passo distinto.
+        Retorna False (sem escrever em out) se V for mal condicionado (A quase defectiva).
+        """
+        A_cl, B_cl, C_cl, D_cl = ss_cl
+        lams, V = np.linalg.eig(A_cl)
+        if not np.linalg.cond(V) < _MODAL_COND_MAX:
+            return False
+        gains = (C_cl[0] @ V) * np.linalg.solve(V, B_cl[:, 0].astype(np.complex128))
+        _modal_step_kernel(t_sim, lams, gains, float(D_cl[0, 0]), out)
+        return True
+
+    def _zoh_step_response(self, ss_cl, t_sim, out):
+        """
+        Degrau unitário da malha fechada por ZOH exato: (Phi, Gamma) = blocos de expm([[A, B], [0, 0]]*dt),
+        um por passo distinto da grade, e laço discreto compilado.
+        """
+        A_cl, B_cl, C_cl, D_cl = ss_cl
+        n = A_cl.shape[0]
+        if self._dt_idx is None:
+            self._dt_uniq, self._dt_idx = np.unique(np.diff(t_sim), return_inverse=True)
+        M = np.zeros((len(self._dt_uniq), n + 1, n + 1))
+        M[:, :n, :n], M[:, :n, n] = A_cl, B_cl[:, 0]
+        E = expm(M * self._dt_uniq[:, None, None])
+        _dstep_kernel(np.ascontiguousarray(E[:, :n, :n]), np.ascontiguousarray(E[:, :n, n]),
+                      self._dt_idx, np.ascontiguousarray(C_cl[0]), float(D_cl[0, 0]), out)
+
+    def simulate_closed_loop(self, setpoint=1.0, k_p=None, t_i=None, t_d=None, out=None):
         """
         Simula T(s) = (Gc*Gp)/(1+Gc*Gp) para a aba Controle PID.
+        Resposta exata ao degrau em qualquer grade: ZOH num laço discreto (grade uniforme) ou forma modal.
         Retorna **resposta relativa (Δy)**: 0 → (SP_abs - y0).
         O campo SP na GUI é ABSOLUTO; aqui convertemos para Δ.
+        A resposta é escrita em 'out' (padrão: buffer do modelo, sobrescrito a cada simulação).
         """
         if self.t is None or not np.isfinite(self.tau) or not np.isfinite(self.k):
             return None, None, None
@@ -314,21 +645,26 @@ class PIDModel:
         Td = t_d if (t_d is not None and np.isfinite(t_d)) else self.Td
         self.Kp, self.Ti, self.Td = Kp, Ti, Td
 
-        # Controlador e planta (Padé de malha fechada = 1, como no Colab)
-        Gc = self._get_pid_tf()
-        nd, dd = pade(self.theta, self.pade_order_cl)       # 1
-        Gp = tf([self.k], [self.tau, 1]) * tf(nd, dd)
-        T = feedback(Gc * Gp, 1)
+        # Malha fechada em espaço de estados (Padé de malha fechada = 1, como no Colab)
+        t_sim = self.t
+        if out is None:
+            out = self._y_cl_buf
+        ss_cl = self._closed_loop_ss(Kp, Ti, Td)
 
-        # Resposta unitária 0→1
-        t_sim, y_unit = step_response(T, T=self.t)
+        # Resposta unitária 0→1, direto no buffer de saída: forma modal em grade não uniforme,
+        # ZOH passo a passo na grade uniforme (ou se a forma modal for mal condicionada)
+        if ss_cl is None:
+            out.fill(0.0)
+        elif self._uniform_grid or not self._modal_step_response(ss_cl, t_sim, out):
+            self._zoh_step_response(ss_cl, t_sim, out)
+        y_unit = out
 
         # Converte SP ABSOLUTO da GUI para Δ-alvo
         if setpoint is None or not np.isfinite(setpoint):
             setpoint = self.y0 + self.den_norm              # default = final experimental
 
         y_final_rel = (setpoint - self.y0)                  # Δ-alvo
-        y_cl_rel    = y_final_rel * y_unit                  # 0 → (SP - y0)
+        y_cl_rel    = np.multiply(y_unit, y_final_rel, out=y_unit)  # 0 → (SP - y0)
 
         # Métricas em coordenadas relativas
         metrics_data = self.calculate_metrics(t_sim, y_cl_rel, y_final_rel)
@@ -345,18 +681,8 @@ class PIDModel:
         if y is None or y_final is None or len(y) == 0 or not np.any(np.isfinite(y)):
             return {'tr': np.nan, 'ts': np.nan, 'Mp': np.nan, 'ess': np.nan}
 
-        yss = y[-1]
-        ess = abs(y_final - yss)
-
-        t10 = t[np.where(y >= 0.1 * y_final)[0][0]] if np.any(y >= 0.1 * y_final) else np.nan
-        t90 = t[np.where(y >= 0.9 * y_final)[0][0]] if np.any(y >= 0.9 * y_final) else np.nan
-        tr = t90 - t10 if np.isfinite(t10) and np.isfinite(t90) else np.nan
-
-        Mp_value = np.max(y)
-        Mp = (Mp_value - y_final) / y_final * 100.0 if (y_final != 0 and Mp_value > y_final) else 0.0
-
-        band = 0.02 * abs(y_final)
-        outside = np.where(np.abs(y - y_final) > band)[0]
-        ts = (t[outside[-1] + 1] if len(outside) and outside[-1] + 1 < len(t) else (t[-1] if len(outside) else t[0]))
+        t = np.ascontiguousarray(t, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        tr, ts, Mp, ess = _metrics_kernel(t, y, float(y_final))
 
         return {'tr': tr, 'ts': ts, 'Mp': Mp, 'ess': ess}
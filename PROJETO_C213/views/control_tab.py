@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QLineEdit
 from PyQt5.QtCore import QLocale, Qt
 import pyqtgraph as pg
 import numpy as np
+from .plot_items import configure_plot, remove_plot_item
 
 class ControlTab(QWidget):
     """
@@ -105,6 +106,37 @@ class ControlTab(QWidget):
         self.plot_widget.setLabel('bottom', 'Tempo (s)')
         self.plot_widget.setTitle("Resposta do Controle PID")
         self.layout.addWidget(self.plot_widget)
+        self._create_plot_items()
+
+    def _create_plot_items(self):
+        """Cria a curva, as linhas e os marcadores persistentes do gráfico (atualizados pelo Controller)."""
+        # Canetas e pincéis criados uma única vez e compartilhados pelos itens
+        pen_sp = pg.mkPen('b', width=1, style=Qt.DashLine)
+        pen_mp = pg.mkPen('r', width=1, style=Qt.DotLine)
+        pen_ts = pg.mkPen('g', width=1, style=Qt.DotLine)
+
+        configure_plot(self.plot_widget)
+
+        # CRIAÇÃO DA LEGENDA NA POSIÇÃO INFERIOR DIREITA
+        self.plot_widget.addLegend(offset=(-1, -1))
+        self.curve_response = pg.PlotDataItem([], [], pen=pg.mkPen('k', width=2), name='Resposta PID')
+
+        # SetPoint: linha horizontal azul tracejada + item da legenda
+        self.sp_line = pg.InfiniteLine(angle=0, pen=pen_sp)
+        self.sp_legend = pg.PlotDataItem([], [], pen=pen_sp, name='SetPoint (SP)')
+
+        # Overshoot: linha do pico, ponto, anotação e item da legenda (vermelhos)
+        self.mp_line = pg.InfiniteLine(angle=0, pen=pen_mp)
+        self.mp_marker = pg.PlotDataItem([], [], symbol='o', symbolSize=8,
+                                         symbolPen=pg.mkPen('r', width=2), symbolBrush=pg.mkBrush('r'))
+        self.mp_text = pg.TextItem(anchor=(0.5, 1.5))
+        self.mp_legend = pg.PlotDataItem([], [], pen=pen_mp, name='Overshoot (Mp)')
+
+        # Tempo de acomodação: linha vertical, ponto e anotação (verdes)
+        self.ts_line = pg.InfiniteLine(angle=90, pen=pen_ts)
+        self.ts_marker = pg.PlotDataItem([], [], symbol='o', symbolSize=8,
+                                         symbolPen=pg.mkPen('g', width=2), symbolBrush=pg.mkBrush('g'))
+        self.ts_text = pg.TextItem(anchor=(0.5, 0))
 
     def _create_spin_box(self, min_val=0.0, max_val=10000.0, decimals=4, default_val=0.0):
         """Cria um QDoubleSpinBox padronizado para entrada/saída de parâmetros PID e SetPoint."""
@@ -135,6 +167,13 @@ class ControlTab(QWidget):
         self.le_mp.setText("--- %")
         self.le_ess.setText("---")
 
+    def clear_plot(self):
+        """Retira do gráfico todos os itens persistentes (a legenda acompanha), sem destruí-los."""
+        for item in (self.curve_response, self.sp_line, self.sp_legend,
+                     self.mp_line, self.mp_marker, self.mp_text, self.mp_legend,
+                     self.ts_line, self.ts_marker, self.ts_text):
+            remove_plot_item(self.plot_widget, item)
+
     def clear_tuning_fields(self):
         """Limpa e define valores padrão para os campos Kp, Ti, Td, Lambda no modo Manual."""
         self.le_kp.setValue(0.0)
@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QLineEdit
 from PyQt5.QtCore import QLocale, Qt
 import pyqtgraph as pg
 import numpy as np
+from .plot_items import configure_plot, remove_plot_item
 
 class IdentificationTab(QWidget):
     """
@@ -69,6 +70,13 @@ class IdentificationTab(QWidget):
         self.plot_widget.setTitle("Curva de Reação (Experimental vs Modelo)")
         self.layout.addWidget(self.plot_widget)
 
+        configure_plot(self.plot_widget)
+
+        # Curvas persistentes: criadas uma vez e atualizadas com setData pelo Controller
+        self.plot_widget.addLegend()
+        self.curve_exp = pg.PlotDataItem([], [], pen=pg.mkPen('k'), name='Experimental')
+        self.curve_model = pg.PlotDataItem([], [], pen=pg.mkPen('r', width=2), name='Modelo FOPDT')
+
     def _create_line_edit(self):
         """Cria e formata um QLineEdit como campo de saída (somente leitura)."""
         le = QLineEdit()
@@ -84,5 +92,7 @@ class IdentificationTab(QWidget):
         self.le_theta.setText("---")
         self.le_rmse.setText("---")
         self.le_method.setText("N/A")
-        self.plot_widget.clear()
+        for curve in (self.curve_exp, self.curve_model):
+            curve.setData([], [])
+            remove_plot_item(self.plot_widget, curve)
         self.btn_export_graph.setEnabled(False)
\ No newline at end of file
@@ -0,0 +1,22 @@
+import pyqtgraph as pg
+
+
+def configure_plot(plot):
+    """
+    Downsampling automático (preserva picos) e recorte à área visível para registros longos.
+    Fica no PlotItem porque addItem reaplica esse modo a cada curva inserida.
+    """
+    plot.setDownsampling(auto=True, mode='peak')
+    plot.setClipToView(True)
+
+
+def remove_plot_item(plot, item):
+    """
+    Retira um item persistente do gráfico (PlotWidget ou PlotItem) sem destruí-lo; a legenda acompanha.
+    Curvas com recorte à área visível perdem o ViewBox durante a remoção e o pyqtgraph tenta
+    recortá-las contra o PlotWidget (AttributeError: autoRangeEnabled); por isso o recorte é
+    desligado antes, e o addItem do PlotItem o religa quando a curva volta ao gráfico.
+    """
+    if isinstance(item, pg.PlotDataItem):
+        item.setClipToView(False)
+    plot.removeItem(item)